@@ -1,32 +1,31 @@
 import sqlite3
-import json
+from itertools import groupby
 
 conn = sqlite3.connect('/Users/pipi/Dveloper/workspace/card-game/api-server/card_game.db')
 
+# 一次查询展开卡组 JSON 并关联卡牌表，避免逐卡组、逐卡牌查询
+rows = conn.execute('''
+    SELECT d.id, d.name, d.leader_card_number,
+           json_extract(v.value, '$.card_number') AS num,
+           json_extract(v.value, '$.count') AS cnt,
+           c.card_number, c.name_cn, c.card_type, c.effect, c."trigger"
+    FROM decks d
+    LEFT JOIN json_each(d.cards) v
+    LEFT JOIN cards c ON c.card_number = json_extract(v.value, '$.card_number')
+    ORDER BY d.rowid, v.key
+''').fetchall()
+decks = [(deck, list(entries)) for deck, entries in groupby(rows, key=lambda r: r[:3])]
+
 print('=== 已有卡组 ===')
-cursor = conn.execute('SELECT id, name, leader_card_number FROM decks')
-decks = cursor.fetchall()
-for d in decks:
-    print(f'ID:{d[0]} 名称:{d[1]} 领袖:{d[2]}')
+for (deck_id, deck_name, leader_num), _ in decks:
+    print(f'ID:{deck_id} 名称:{deck_name} 领袖:{leader_num}')
 
 print()
-for deck_id, deck_name, leader_num in decks:
+for (deck_id, deck_name, leader_num), entries in decks:
     print(f'\n===== 卡组 {deck_id}: {deck_name} =====')
-    
-    cursor = conn.execute('SELECT cards FROM decks WHERE id=?', (deck_id,))
-    cards_json = cursor.fetchone()[0]
-    card_list = json.loads(cards_json)
-    
-    # card_list 是 [{card_number, count}, ...] 格式
-    card_counts = {}
-    for entry in card_list:
-        card_counts[entry['card_number']] = entry['count']
-    
-    for card_num, count in card_counts.items():
-        cursor = conn.execute('SELECT name_cn, card_type, effect, "trigger" FROM cards WHERE card_number=?', (card_num,))
-        row = cursor.fetchone()
-        if row:
-            name, ctype, effect, trigger = row
+
+    for *_, card_num, count, found, name, ctype, effect, trigger in entries:
+        if found:
             print(f'\n[{card_num}] {name} x{count} ({ctype})')
             if effect:
                 eff = effect[:180] + '...' if len(effect or '') > 180 else effect
@@ -0,0 +1,126 @@
+"""In-process card cache - cards are reference data keyed by card_number.
+
+The scraper writes cards from a separate process, so the cache compares the
+cards_version counter (bumped by triggers on every write) and reloads on change.
+"""
+import time
+
+from sqlalchemy import select, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Iterable, Optional
+
+from app.database import async_session
+from app.models import Card
+
+# 列投影：直接取元组，按 CARD_FIELDS 组装响应，绕过 ORM 实体构建与属性访问
+CARD_COLUMNS = (
+    Card.id,
+    Card.card_number,
+    Card.name,
+    Card.name_cn,
+    Card.card_type,
+    Card.color,
+    Card.cost,
+    Card.power,
+    Card.counter,
+    Card.life,
+    Card.attribute,
+    Card.effect,
+    Card.trigger,
+    Card.trait,
+    Card.rarity,
+    Card.set_code,
+    Card.image_url,
+    Card.image_local,
+)
+CARD_FIELDS = (
+    "id",
+    "cardNumber",
+    "name",
+    "nameCn",
+    "cardType",
+    "color",
+    "cost",
+    "power",
+    "counter",
+    "life",
+    "attribute",
+    "effect",
+    "trigger",
+    "trait",
+    "rarity",
+    "setCode",
+    "imageUrl",
+    "imageLocal",
+)
+
+_STMT_BY_NUMBER = select(*CARD_COLUMNS).where(Card.card_number == bindparam("card_number"))
+
+_STMT_VERSION = text("SELECT version FROM cards_version WHERE id = 1")
+
+_card_cache: dict[str, dict] = {}
+_cache_version: Optional[int] = None
+_next_version_check = 0.0
+_VERSION_CHECK_INTERVAL = 1.0  # 秒；最多每秒查一次版本号，数据变更后最迟约 1 秒生效
+
+
+def card_to_dict(row) -> dict:
+    return dict(zip(CARD_FIELDS, row))
+
+
+async def _check_version(session: AsyncSession):
+    """Clear the cache when cards were written since it was filled."""
+    global _cache_version, _next_version_check
+    now = time.monotonic()
+    if now < _next_version_check:
+        return
+    _next_version_check = now + _VERSION_CHECK_INTERVAL
+    version = (await session.execute(_STMT_VERSION)).scalar()
+    if version != _cache_version:
+        _card_cache.clear()
+        _cache_version = version
+
+
+async def get_card_cached(session: AsyncSession, card_number: str) -> Optional[dict]:
+    """Get a single card dict, hitting the database only on a cache miss."""
+    await _check_version(session)
+    card = _card_cache.get(card_number)
+    if card is None:
+        result = await session.execute(_STMT_BY_NUMBER, {"card_number": card_number})
+        row = result.first()
+        if row:
+            card = _card_cache[card_number] = card_to_dict(row)
+    return card
+
+
+async def get_cards_cached(session: AsyncSession, card_numbers: Iterable[str]) -> dict[str, dict]:
+    """Batch variant - all cache misses are fetched with a single IN query."""
+    await _check_version(session)
+    found = {}
+    missing = []
+    for num in dict.fromkeys(card_numbers):  # 去重，保持顺序
+        card = _card_cache.get(num)
+        if card is not None:
+            found[num] = card
+        else:
+            missing.append(num)
+    if missing:
+        result = await session.execute(
+            select(*CARD_COLUMNS).where(Card.card_number.in_(missing))
+        )
+        for row in result.all():
+            card = _card_cache[row.card_number] = card_to_dict(row)
+            found[row.card_number] = card
+    return found
+
+
+async def prewarm_card_cache():
+    """Load every card into the cache once at startup."""
+    global _cache_version, _next_version_check
+    async with async_session() as session:
+        _cache_version = (await session.execute(_STMT_VERSION)).scalar()
+        _next_version_check = time.monotonic() + _VERSION_CHECK_INTERVAL
+        result = await session.execute(select(*CARD_COLUMNS))
+        for row in result.all():
+            _card_cache[row.card_number] = card_to_dict(row)
+
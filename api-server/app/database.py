@@ -1,10 +1,36 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# 长连接池：连接复用，SQLite 页缓存在请求之间保持热状态
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=False,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=10,
+    max_overflow=5,
+    pool_pre_ping=False,
+    pool_recycle=3600,
+    # timeout: 爬虫与 API 同时写库时等待锁释放，而不是立即报 database is locked
+    connect_args={"check_same_thread": False, "cached_statements": 256, "timeout": 30},
+)
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """新建连接时设置 SQLite PRAGMA，随连接在池中的生命周期一直生效"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # 读不阻塞写
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+    cursor.execute("PRAGMA cache_size=-131072")  # 128 MiB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
 
 
 class Base(DeclarativeBase):
@@ -16,6 +42,88 @@ async def get_db():
         yield session
 
 
+# 卡牌全文检索：FTS5 外部内容表 + 触发器，与 cards 表保持同步
+# trigram 分词支持任意子串匹配（中文没有空格分词，unicode61 会把整段汉字当成一个词），
+# 语义与原先的 LIKE '%q%' 一致；少于 3 个字符的查询无法用 trigram，由调用方回退到 LIKE
+CARDS_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+        card_number, name, name_cn, trait, effect,
+        content='cards', content_rowid='rowid',
+        tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_fts_ai AFTER INSERT ON cards BEGIN
+        INSERT INTO cards_fts(rowid, card_number, name, name_cn, trait, effect)
+        VALUES (new.rowid, new.card_number, new.name, new.name_cn, new.trait, new.effect);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_fts_ad AFTER DELETE ON cards BEGIN
+        INSERT INTO cards_fts(cards_fts, rowid, card_number, name, name_cn, trait, effect)
+        VALUES ('delete', old.rowid, old.card_number, old.name, old.name_cn, old.trait, old.effect);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_fts_au AFTER UPDATE ON cards BEGIN
+        INSERT INTO cards_fts(cards_fts, rowid, card_number, name, name_cn, trait, effect)
+        VALUES ('delete', old.rowid, old.card_number, old.name, old.name_cn, old.trait, old.effect);
+        INSERT INTO cards_fts(rowid, card_number, name, name_cn, trait, effect)
+        VALUES (new.rowid, new.card_number, new.name, new.name_cn, new.trait, new.effect);
+    END
+    """,
+]
+
+
+# 卡牌数据版本号：cards 表任何写入都会递增，供 API 进程内的卡牌缓存判断是否过期
+# （爬虫是独立进程，无法直接通知 API 清缓存）
+CARDS_VERSION_DDL = [
+    "CREATE TABLE IF NOT EXISTS cards_version (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cards_version (id, version) VALUES (1, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_version_ai AFTER INSERT ON cards BEGIN
+        UPDATE cards_version SET version = version + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_version_ad AFTER DELETE ON cards BEGIN
+        UPDATE cards_version SET version = version + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cards_version_au AFTER UPDATE ON cards BEGIN
+        UPDATE cards_version SET version = version + 1 WHERE id = 1;
+    END
+    """,
+]
+
+
+def _create_missing_indexes(sync_conn):
+    """create_all 不会给已存在的表补建索引，这里逐个检查补齐"""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+
+        result = await conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='cards_fts'"
+        )
+        row = result.first()
+        fts_exists = row is not None
+        if fts_exists and "trigram" not in row[0]:
+            # 旧库用的是 unicode61 分词，删掉重建
+            await conn.exec_driver_sql("DROP TABLE cards_fts")
+            fts_exists = False
+        for ddl in CARDS_FTS_DDL:
+            await conn.exec_driver_sql(ddl)
+        if not fts_exists:
+            # 首次创建时为已有卡牌建立索引
+            await conn.exec_driver_sql("INSERT INTO cards_fts(cards_fts) VALUES ('rebuild')")
+        for ddl in CARDS_VERSION_DDL:
+            await conn.exec_driver_sql(ddl)
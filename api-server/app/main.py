@@ -1,21 +1,32 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
+import orjson
 import os
 
 from app.routers import auth, decks, ocr, cards
+from app.cache import prewarm_card_cache
 from app.database import init_db
 from app.seed import seed_mock_cards
 
 load_dotenv()
 
 
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化响应，比标准库 json 快数倍"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
     await seed_mock_cards()
+    await prewarm_card_cache()
     yield
 
 
@@ -24,6 +35,7 @@ app = FastAPI(
     version="0.2.0",
     lifespan=lifespan,
     redirect_slashes=False,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS 配置
@@ -55,4 +67,3 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "ok"}
-    return {"status": "ok"}
@@ -1,8 +1,39 @@
-from sqlalchemy import Column, String, Integer, Text, JSON, DateTime, func
+from sqlalchemy import Column, String, Integer, Text, DateTime, Index, func, text
+from sqlalchemy.types import TypeDecorator
 from app.database import Base
+import orjson
 import uuid
 
 
+class UpperString(TypeDecorator):
+    """写入时统一转大写的字符串列；作为查询参数绑定时同样生效，调用方无需再 .upper()"""
+
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return value.upper()
+        return value
+
+
+class OrjsonJSON(TypeDecorator):
+    """以 TEXT 存储的 JSON 列，用 orjson 代替标准库做序列化/反序列化"""
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.dumps(value).decode()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return orjson.loads(value)
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -19,20 +50,28 @@ class Deck(Base):
     user_id = Column(String, nullable=False, index=True)
     name = Column(String(100), nullable=False)
     leader_card_number = Column(String(20), nullable=True)
-    cards = Column(JSON, default=list)
+    cards = Column(OrjsonJSON, default=list)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
 
 class Card(Base):
     __tablename__ = "cards"
+    # 复合索引：前导列匹配等值过滤，末尾 card_number 直接满足 ORDER BY，免去排序
+    __table_args__ = (
+        Index("ix_cards_set_type_num", "set_code", "card_type", "card_number"),
+        Index("ix_cards_color_cost_num", "color", "cost", "card_number"),
+        Index("ix_cards_type_num", "card_type", "card_number"),
+        # 部分索引：get_deck_cards 的 card_type != 'LEADER' 无法走等值索引，改为按卡包范围扫描
+        Index("ix_nonleader_set_num", "set_code", "card_number", sqlite_where=text("card_type <> 'LEADER'")),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    card_number = Column(String(20), unique=True, nullable=False, index=True)
+    card_number = Column(UpperString, unique=True, nullable=False, index=True)
     name = Column(String(200), nullable=False)
     name_cn = Column(String(200), nullable=True, index=True)
     card_type = Column(String(20), nullable=False, index=True)
-    color = Column(String(50), nullable=False, index=True)
+    color = Column(UpperString, nullable=False, index=True)
     cost = Column(Integer, nullable=True)
     power = Column(Integer, nullable=True)
     counter = Column(Integer, nullable=True)
@@ -42,7 +81,7 @@ class Card(Base):
     trigger = Column(Text, nullable=True)
     trait = Column(String(200), nullable=True)
     rarity = Column(String(10), nullable=True)
-    set_code = Column(String(20), nullable=True, index=True)
+    set_code = Column(UpperString, nullable=True, index=True)
     image_url = Column(String(500), nullable=True)
     image_local = Column(String(300), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import uuid
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta
+from sqlalchemy import select, insert, bindparam
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.database import get_db
+from app.models import User
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt 为同步 CPU 密集操作：降低轮数，并在线程中执行避免阻塞事件循环
+pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=10, deprecated="auto")
 
-# 简易内存存储（后续可换数据库）
-users_db: dict[str, dict] = {}
+# 登录热路径只取需要的两列，语句导入时构建一次
+_STMT_USER_BY_NAME = select(User.id, User.hashed_password).where(User.username == bindparam("username"))
 
 
 class AuthRequest(BaseModel):
@@ -33,26 +41,33 @@ def create_token(user_id: str, username: str) -> str:
 
 
 @router.post("/register", response_model=AuthResponse)
-async def register(req: AuthRequest):
-    if req.username in users_db:
+async def register(req: AuthRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(_STMT_USER_BY_NAME, {"username": req.username})
+    if result.first():
         raise HTTPException(status_code=400, detail="用户名已存在")
 
-    import uuid
     user_id = str(uuid.uuid4())
-    users_db[req.username] = {
-        "id": user_id,
-        "username": req.username,
-        "hashed_password": pwd_context.hash(req.password),
-    }
+    hashed_password = await asyncio.to_thread(pwd_context.hash, req.password)
+    try:
+        await db.execute(
+            insert(User).values(id=user_id, username=req.username, hashed_password=hashed_password)
+        )
+        await db.commit()
+    except IntegrityError:
+        # 并发注册同名用户
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="用户名已存在")
+
     token = create_token(user_id, req.username)
     return {"token": token, "user": {"id": user_id, "username": req.username}}
 
 
 @router.post("/login", response_model=AuthResponse)
-async def login(req: AuthRequest):
-    user = users_db.get(req.username)
-    if not user or not pwd_context.verify(req.password, user["hashed_password"]):
+async def login(req: AuthRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(_STMT_USER_BY_NAME, {"username": req.username})
+    user = result.first()
+    if not user or not await asyncio.to_thread(pwd_context.verify, req.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="用户名或密码错误")
 
-    token = create_token(user["id"], user["username"])
-    return {"token": token, "user": {"id": user["id"], "username": user["username"]}}
+    token = create_token(user.id, req.username)
+    return {"token": token, "user": {"id": user.id, "username": req.username}}
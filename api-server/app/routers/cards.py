@@ -1,13 +1,80 @@
 """Card data API router - query, search, and manage card data."""
-from fastapi import APIRouter, Query, HTTPException
-from sqlalchemy import select, or_
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy import select, or_, text, bindparam
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from app.database import async_session
+from app.cache import CARD_COLUMNS, card_to_dict, get_card_cached
+from app.database import get_db
 from app.models import Card
 
 router = APIRouter()
 
+# 列表/搜索只取各调用方实际用到的列（卡组构建器，以及 game-server 用 /api/cards 构建卡池：
+# 领袖 life 决定生命数，attribute/rarity 随卡牌下发，setCode 用于按卡包筛选）；
+# id、image_local 等其余字段仅在单卡详情中返回
+_LIST_COLS = (
+    Card.card_number,
+    Card.name,
+    Card.name_cn,
+    Card.card_type,
+    Card.color,
+    Card.cost,
+    Card.power,
+    Card.counter,
+    Card.life,
+    Card.attribute,
+    Card.effect,
+    Card.trigger,
+    Card.trait,
+    Card.rarity,
+    Card.set_code,
+    Card.image_url,
+)
+_LIST_KEYS = (
+    "cardNumber",
+    "name",
+    "nameCn",
+    "cardType",
+    "color",
+    "cost",
+    "power",
+    "counter",
+    "life",
+    "attribute",
+    "effect",
+    "trigger",
+    "trait",
+    "rarity",
+    "setCode",
+    "imageUrl",
+)
+
+_FTS_SEARCH_SQL = text(
+    "SELECT " + ", ".join(f'cards."{c.name}"' for c in _LIST_COLS)
+    + " FROM cards_fts JOIN cards ON cards.rowid = cards_fts.rowid"
+    " WHERE cards_fts MATCH :q ORDER BY cards.card_number LIMIT 50"
+)
+
+# 固定查询在导入时构建一次，处理请求时只绑定参数，复用 SQLAlchemy 编译缓存
+_STMT_BY_SET = (
+    select(*CARD_COLUMNS)
+    .where(Card.set_code == bindparam("set_code"))
+    .order_by(Card.card_number)
+)
+_STMT_LEADERS = (
+    select(*CARD_COLUMNS)
+    .where(Card.card_type == "LEADER")
+    .order_by(Card.card_number)
+)
+_STMT_DECK_CARDS = (
+    select(*CARD_COLUMNS)
+    .where(Card.set_code == bindparam("set_code"))
+    .where(Card.card_type != "LEADER")
+    .order_by(Card.card_number)
+)
+
 
 @router.get("")
 async def list_cards(
@@ -18,134 +85,100 @@ async def list_cards(
     q: Optional[str] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
 ):
     """List cards with optional filters and pagination."""
-    async with async_session() as session:
-        query = select(Card)
-
-        if color:
-            query = query.where(Card.color == color.upper())
-        if card_type:
-            # 支持中文和英文类型名
-            query = query.where(Card.card_type == card_type)
-        if cost is not None:
-            query = query.where(Card.cost == cost)
-        if set_code:
-            query = query.where(Card.set_code == set_code.upper())
-        if q:
-            query = query.where(
-                or_(
-                    Card.name.ilike(f"%{q}%"),
-                    Card.name_cn.ilike(f"%{q}%"),
-                    Card.card_number.ilike(f"%{q}%"),
-                    Card.trait.ilike(f"%{q}%"),
-                )
+    query = select(*_LIST_COLS)
+
+    if color:
+        query = query.where(Card.color == color)
+    if card_type:
+        # 支持中文和英文类型名
+        query = query.where(Card.card_type == card_type)
+    if cost is not None:
+        query = query.where(Card.cost == cost)
+    if set_code:
+        query = query.where(Card.set_code == set_code)
+    if q:
+        query = query.where(
+            or_(
+                Card.name.ilike(f"%{q}%"),
+                Card.name_cn.ilike(f"%{q}%"),
+                Card.card_number.ilike(f"%{q}%"),
+                Card.trait.ilike(f"%{q}%"),
             )
+        )
 
-        query = query.order_by(Card.card_number)
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size)
+    query = query.order_by(Card.card_number)
+    offset = (page - 1) * page_size
+    query = query.offset(offset).limit(page_size)
 
-        result = await session.execute(query)
-        cards = result.scalars().all()
+    result = await db.execute(query)
+    cards = result.all()
 
-        return {
-            "cards": [_card_to_dict(c) for c in cards],
-            "page": page,
-            "page_size": page_size,
-        }
+    return {
+        "cards": [dict(zip(_LIST_KEYS, c)) for c in cards],
+        "page": page,
+        "page_size": page_size,
+    }
 
 
 @router.get("/search")
-async def search_cards(q: str = Query(..., min_length=1)):
+async def search_cards(q: str = Query(..., min_length=1), db: AsyncSession = Depends(get_db)):
     """Full-text search for cards by name, trait, or card number."""
-    async with async_session() as session:
-        query = select(Card).where(
-            or_(
-                Card.name.ilike(f"%{q}%"),
-                Card.name_cn.ilike(f"%{q}%"),
-                Card.card_number.ilike(f"%{q}%"),
-                Card.trait.ilike(f"%{q}%"),
-                Card.effect.ilike(f"%{q}%"),
-            )
-        ).order_by(Card.card_number).limit(50)
+    # 3 个字符及以上走 trigram 索引做子串匹配；引号包裹防止用户输入被解析为 FTS 语法
+    if len(q) >= 3:
+        try:
+            result = await db.execute(_FTS_SEARCH_SQL, {"q": '"' + q.replace('"', '""') + '"'})
+            return {"cards": [dict(zip(_LIST_KEYS, c)) for c in result.all()]}
+        except OperationalError:
+            pass  # FTS 表不可用时回退
+
+    # 短查询（trigram 至少需要 3 个字符）用 LIKE 子串匹配，排序与 FTS 路径一致
+    query = select(*_LIST_COLS).where(
+        or_(
+            Card.name.ilike(f"%{q}%"),
+            Card.name_cn.ilike(f"%{q}%"),
+            Card.card_number.ilike(f"%{q}%"),
+            Card.trait.ilike(f"%{q}%"),
+            Card.effect.ilike(f"%{q}%"),
+        )
+    ).order_by(Card.card_number).limit(50)
 
-        result = await session.execute(query)
-        cards = result.scalars().all()
-        return {"cards": [_card_to_dict(c) for c in cards]}
+    result = await db.execute(query)
+    cards = result.all()
+    return {"cards": [dict(zip(_LIST_KEYS, c)) for c in cards]}
 
 
 @router.get("/{card_number}")
-async def get_card(card_number: str):
+async def get_card(card_number: str, db: AsyncSession = Depends(get_db)):
     """Get a single card by card number."""
-    async with async_session() as session:
-        result = await session.execute(
-            select(Card).where(Card.card_number == card_number.upper())
-        )
-        card = result.scalars().first()
-        if not card:
-            raise HTTPException(status_code=404, detail="Card not found")
-        return _card_to_dict(card)
+    card = await get_card_cached(db, card_number.upper())
+    if not card:
+        raise HTTPException(status_code=404, detail="Card not found")
+    return card
 
 
 @router.get("/set/{set_code}")
-async def get_cards_by_set(set_code: str):
+async def get_cards_by_set(set_code: str, db: AsyncSession = Depends(get_db)):
     """Get all cards from a specific set."""
-    async with async_session() as session:
-        result = await session.execute(
-            select(Card)
-            .where(Card.set_code == set_code.upper())
-            .order_by(Card.card_number)
-        )
-        cards = result.scalars().all()
-        return {"set_code": set_code.upper(), "cards": [_card_to_dict(c) for c in cards]}
+    result = await db.execute(_STMT_BY_SET, {"set_code": set_code})
+    cards = result.all()
+    return {"set_code": set_code.upper(), "cards": [card_to_dict(c) for c in cards]}
 
 
 @router.get("/leaders/all")
-async def get_all_leaders():
+async def get_all_leaders(db: AsyncSession = Depends(get_db)):
     """Get all leader cards."""
-    async with async_session() as session:
-        result = await session.execute(
-            select(Card)
-            .where(Card.card_type == "LEADER")
-            .order_by(Card.card_number)
-        )
-        cards = result.scalars().all()
-        return {"leaders": [_card_to_dict(c) for c in cards]}
+    result = await db.execute(_STMT_LEADERS)
+    cards = result.all()
+    return {"leaders": [card_to_dict(c) for c in cards]}
 
 
 @router.get("/deck-cards/{set_code}")
-async def get_deck_cards(set_code: str):
+async def get_deck_cards(set_code: str, db: AsyncSession = Depends(get_db)):
     """Get all non-leader cards from a set (for building a deck)."""
-    async with async_session() as session:
-        result = await session.execute(
-            select(Card)
-            .where(Card.set_code == set_code.upper())
-            .where(Card.card_type != "LEADER")
-            .order_by(Card.card_number)
-        )
-        cards = result.scalars().all()
-        return {"cards": [_card_to_dict(c) for c in cards]}
-
+    result = await db.execute(_STMT_DECK_CARDS, {"set_code": set_code})
+    cards = result.all()
+    return {"cards": [card_to_dict(c) for c in cards]}
 
-def _card_to_dict(card: Card) -> dict:
-    return {
-        "id": card.id,
-        "cardNumber": card.card_number,
-        "name": card.name,
-        "nameCn": card.name_cn,
-        "cardType": card.card_type,
-        "color": card.color,
-        "cost": card.cost,
-        "power": card.power,
-        "counter": card.counter,
-        "life": card.life,
-        "attribute": card.attribute,
-        "effect": card.effect,
-        "trigger": card.trigger,
-        "trait": card.trait,
-        "rarity": card.rarity,
-        "setCode": card.set_code,
-        "imageUrl": card.image_url,
-        "imageLocal": card.image_local,
-    }
@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
-from sqlalchemy import select
-from sqlalchemy.orm.attributes import flag_modified
-from typing import Optional
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
-from app.database import async_session
-from app.models import Deck, Card
+from app.cache import get_cards_cached
+from app.database import get_db
+from app.models import Deck
 
 router = APIRouter()
 
@@ -25,111 +25,119 @@ class DeckCreate(BaseModel):
 @router.get("")
 async def list_decks(
     user_id: str = Query(default="system", description="用户ID"),
+    db: AsyncSession = Depends(get_db),
 ):
     """获取指定用户的卡组列表"""
-    async with async_session() as session:
-        query = select(Deck).where(Deck.user_id == user_id)
-        result = await session.execute(query)
-        decks = result.scalars().all()
-        
-        output = []
-        for deck in decks:
-            total_cards = sum(c.get('count', 1) for c in (deck.cards or []))
-            output.append({
-                "id": deck.id,
-                "user_id": deck.user_id,
-                "name": deck.name,
-                "leader_card_number": deck.leader_card_number,
-                "cards": deck.cards or [],
-                "total_cards": total_cards,
-            })
-        return output
+    # 卡牌总数在 SQLite 内通过 json_each 聚合，无需逐行遍历 JSON
+    entries = func.json_each(Deck.cards).table_valued("value")
+    total_cards = (
+        select(func.coalesce(func.sum(func.coalesce(func.json_extract(entries.c.value, "$.count"), 1)), 0))
+        .select_from(entries)
+        .scalar_subquery()
+    )
+    query = select(Deck, total_cards).where(Deck.user_id == user_id)
+    result = await db.execute(query)
+    
+    output = []
+    for deck, total_cards in result.all():
+        output.append({
+            "id": deck.id,
+            "user_id": deck.user_id,
+            "name": deck.name,
+            "leader_card_number": deck.leader_card_number,
+            "cards": deck.cards or [],
+            "total_cards": total_cards,
+        })
+    return output
 
 
 @router.get("/{deck_id}")
-async def get_deck(deck_id: str):
+async def get_deck(deck_id: str, db: AsyncSession = Depends(get_db)):
     """获取单个卡组详情，包含卡牌完整信息"""
-    async with async_session() as session:
-        # 获取卡组
-        query = select(Deck).where(Deck.id == deck_id)
-        result = await session.execute(query)
-        deck = result.scalar_one_or_none()
-        
-        if not deck:
-            return {"error": "卡组不存在"}
-        
-        # 获取卡牌详细信息
-        cards_detail = []
-        for card_entry in (deck.cards or []):
-            card_number = card_entry.get('card_number')
-            count = card_entry.get('count', 1)
-            
-            card_query = select(Card).where(Card.card_number == card_number)
-            card_result = await session.execute(card_query)
-            card = card_result.scalar_one_or_none()
-            
-            if card:
-                cards_detail.append({
-                    "card_number": card.card_number,
-                    "name": card.name,
-                    "name_cn": card.name_cn,
-                    "card_type": card.card_type,
-                    "color": card.color,
-                    "cost": card.cost,
-                    "power": card.power,
-                    "counter": card.counter,
-                    "effect": card.effect,
-                    "trigger": card.trigger,
-                    "trait": card.trait,
-                    "image_url": card.image_url,
-                    "count": count,
-                })
-        
-        # 获取领袖卡详情
-        leader = None
-        if deck.leader_card_number:
-            leader_query = select(Card).where(Card.card_number == deck.leader_card_number)
-            leader_result = await session.execute(leader_query)
-            leader_card = leader_result.scalar_one_or_none()
-            
-            if leader_card:
-                leader = {
-                    "card_number": leader_card.card_number,
-                    "name": leader_card.name,
-                    "name_cn": leader_card.name_cn,
-                    "color": leader_card.color,
-                    "power": leader_card.power,
-                    "life": leader_card.life,
-                    "effect": leader_card.effect,
-                    "trigger": leader_card.trigger,
-                    "trait": leader_card.trait,
-                    "image_url": leader_card.image_url,
-                }
+    # 获取卡组
+    query = select(Deck).where(Deck.id == deck_id)
+    result = await db.execute(query)
+    deck = result.scalar_one_or_none()
+    
+    if not deck:
+        return {"error": "卡组不存在"}
+    
+    # 一次性批量获取卡组内所有卡牌（含领袖），优先命中进程内缓存
+    nums = [e.get('card_number') for e in (deck.cards or [])]
+    if deck.leader_card_number:
+        nums.append(deck.leader_card_number)
+    by_num = await get_cards_cached(db, nums)
+
+    # 获取卡牌详细信息
+    cards_detail = []
+    for card_entry in (deck.cards or []):
+        card_number = card_entry.get('card_number')
+        count = card_entry.get('count', 1)
+        card = by_num.get(card_number)
         
-        return {
-            "id": deck.id,
-            "user_id": deck.user_id,
-            "name": deck.name,
-            "leader": leader,
-            "cards": cards_detail,
-            "total_cards": sum(c.get('count', 1) for c in (deck.cards or [])),
+        if card:
+            cards_detail.append({
+                "card_number": card["cardNumber"],
+                "name": card["name"],
+                "name_cn": card["nameCn"],
+                "card_type": card["cardType"],
+                "color": card["color"],
+                "cost": card["cost"],
+                "power": card["power"],
+                "counter": card["counter"],
+                "effect": card["effect"],
+                "trigger": card["trigger"],
+                "trait": card["trait"],
+                "image_url": card["imageUrl"],
+                "count": count,
+            })
+    
+    # 获取领袖卡详情
+    leader = None
+    leader_card = by_num.get(deck.leader_card_number)
+    if leader_card:
+        leader = {
+            "card_number": leader_card["cardNumber"],
+            "name": leader_card["name"],
+            "name_cn": leader_card["nameCn"],
+            "color": leader_card["color"],
+            "power": leader_card["power"],
+            "life": leader_card["life"],
+            "effect": leader_card["effect"],
+            "trigger": leader_card["trigger"],
+            "trait": leader_card["trait"],
+            "image_url": leader_card["imageUrl"],
         }
+    
+    return {
+        "id": deck.id,
+        "user_id": deck.user_id,
+        "name": deck.name,
+        "leader": leader,
+        "cards": cards_detail,
+        "total_cards": sum(c.get('count', 1) for c in (deck.cards or [])),
+    }
 
 
 @router.post("")
-async def create_deck(deck: DeckCreate, user_id: str = Query(default="system")):
+async def create_deck(
+    deck: DeckCreate,
+    user_id: str = Query(default="system"),
+    db: AsyncSession = Depends(get_db),
+):
     """创建新卡组"""
-    async with async_session() as session:
-        new_deck = Deck(
-            id=str(uuid.uuid4()),
+    deck_id = str(uuid.uuid4())
+    await db.execute(
+        insert(Deck).values(
+            id=deck_id,
             user_id=user_id,
             name=deck.name,
             leader_card_number=deck.leader_card_number,
             cards=[{"card_number": c.card_number, "count": c.count} for c in deck.cards],
         )
-        session.add(new_deck)
-        await session.commit()
-        return {"id": new_deck.id, "name": new_deck.name}
+    )
+    await db.commit()
+    return {"id": deck_id, "name": deck.name}
 
 
 class DeckUpdate(BaseModel):
@@ -139,37 +147,36 @@ class DeckUpdate(BaseModel):
 
 
 @router.put("/{deck_id}")
-async def update_deck(deck_id: str, deck: DeckUpdate):
+async def update_deck(deck_id: str, deck: DeckUpdate, db: AsyncSession = Depends(get_db)):
     """更新卡组"""
-    async with async_session() as session:
-        query = select(Deck).where(Deck.id == deck_id)
-        result = await session.execute(query)
-        existing_deck = result.scalar_one_or_none()
-
-        if not existing_deck:
-            return {"error": "卡组不存在"}
+    # 单条 UPDATE 完成更新，updated_at 由 onupdate 的 now() 在数据库端写入
+    result = await db.execute(
+        update(Deck)
+        .where(Deck.id == deck_id)
+        .values(
+            name=deck.name,
+            leader_card_number=deck.leader_card_number,
+            cards=[{"card_number": c.card_number, "count": c.count} for c in deck.cards],
+        )
+    )
 
-        existing_deck.name = deck.name
-        existing_deck.leader_card_number = deck.leader_card_number
-        existing_deck.cards = [{"card_number": c.card_number, "count": c.count} for c in deck.cards]
-        flag_modified(existing_deck, "cards")
+    if result.rowcount == 0:
+        return {"error": "卡组不存在"}
 
-        await session.commit()
-        return {"id": existing_deck.id, "name": existing_deck.name}
+    await db.commit()
+    return {"id": deck_id, "name": deck.name}
 
 
 @router.delete("/{deck_id}")
-async def delete_deck(deck_id: str):
+async def delete_deck(deck_id: str, db: AsyncSession = Depends(get_db)):
     """删除卡组"""
-    async with async_session() as session:
-        query = select(Deck).where(Deck.id == deck_id)
-        result = await session.execute(query)
-        deck = result.scalar_one_or_none()
-        
-        if deck:
-            await session.delete(deck)
-            await session.commit()
-            return {"message": "已删除"}
-        return {"error": "卡组不存在"}
+    query = select(Deck).where(Deck.id == deck_id)
+    result = await db.execute(query)
+    deck = result.scalar_one_or_none()
+    
+    if deck:
+        await db.delete(deck)
+        await db.commit()
+        return {"message": "已删除"}
     return {"error": "卡组不存在"}
 
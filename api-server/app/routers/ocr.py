@@ -1,12 +1,19 @@
-import io
+import asyncio
+from typing import Optional
+
 from fastapi import APIRouter, File, UploadFile, HTTPException
-from PIL import Image
 
 router = APIRouter()
 
 # EasyOCR reader 延迟初始化（模型加载较慢）
 _reader = None
 
+# 微批处理：在时间窗口内合并并发请求，一次送入模型以摊薄单张图片的固定开销
+_BATCH_SIZE = 4
+_BATCH_WINDOW = 0.01  # 秒
+_queue: Optional[asyncio.Queue] = None
+_worker: Optional[asyncio.Task] = None
+
 
 def get_ocr_reader():
     global _reader
@@ -16,6 +23,77 @@ def get_ocr_reader():
     return _reader
 
 
+def _readtext_batch(images: list[bytes]) -> list:
+    """在工作线程中识别一批图片，返回与输入一一对应的结果或异常"""
+    import cv2
+    import numpy as np
+
+    reader = get_ocr_reader()
+    # 以 IMREAD_COLOR 解码一次（RGBA 也会转成三通道），之后直接传 ndarray
+    decoded = [cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR) for b in images]
+    results: list = [None] * len(images)
+
+    # readtext_batched 要求同一批图片尺寸一致，否则需缩放并导致 bbox 坐标失真，故按尺寸分组
+    groups: dict[tuple, list[int]] = {}
+    for i, img in enumerate(decoded):
+        if img is None:
+            results[i] = ValueError("无法解码图片")
+        else:
+            groups.setdefault(img.shape, []).append(i)
+
+    for indices in groups.values():
+        try:
+            if len(indices) == 1:
+                outputs = [reader.readtext(decoded[indices[0]], detail=1)]
+            else:
+                outputs = reader.readtext_batched([decoded[i] for i in indices], detail=1)
+        except Exception as e:
+            outputs = [e] * len(indices)
+        for i, output in zip(indices, outputs):
+            results[i] = output
+    return results
+
+
+async def _batch_worker(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + _BATCH_WINDOW
+        while len(batch) < _BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            results = await asyncio.to_thread(_readtext_batch, [contents for contents, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # 请求已取消
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def _readtext(contents: bytes) -> list:
+    """提交图片到批处理队列，等待识别结果"""
+    global _queue, _worker
+    if _worker is None or _worker.done():
+        _queue = asyncio.Queue()
+        _worker = asyncio.create_task(_batch_worker(_queue))
+
+    future = asyncio.get_running_loop().create_future()
+    await _queue.put((contents, future))
+    return await future
+
+
 @router.post("/recognize")
 async def recognize_card(image: UploadFile = File(...)):
     """OCR 识别卡牌图片中的文字"""
@@ -24,17 +102,7 @@ async def recognize_card(image: UploadFile = File(...)):
 
     try:
         contents = await image.read()
-        img = Image.open(io.BytesIO(contents))
-
-        # 转为 RGB（防止 RGBA 报错）
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-
-        reader = get_ocr_reader()
-        results = reader.readtext(
-            io.BytesIO(contents).read(),
-            detail=1,
-        )
+        results = await _readtext(contents)
 
         recognized = []
         for bbox, text, confidence in results:
@@ -12,22 +12,34 @@ One Piece TCG 卡牌爬虫
     # 爬取所有卡牌
     python scraper.py --all
 
+    # 已入库且图片已存在的卡牌默认跳过，--force 重新获取详情并重新下载图片
+    python scraper.py --all --force
+
     # 查看可用卡包列表
     python scraper.py --list-sets
 """
 
 import argparse
 import asyncio
+import logging
 import os
+import queue
 import re
 import sys
+import tempfile
 import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Dict, List, Optional, Set
-from urllib.parse import quote, unquote
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
 
+import aiofiles
 import httpx
-from sqlalchemy import select
+import orjson
+from sqlalchemy import ScalarResult, select, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 # 添加项目根目录到 path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -41,7 +53,17 @@ BASE_API = "https://onepieceserve.windoent.com"
 ORIGIN = "https://www.onepiece-cardgame.cn"
 CARDS_DIR = Path(__file__).parent.parent / "client" / "public" / "cards"
 PAGE_SIZE = 20
-REQUEST_DELAY = 0.3  # 请求间隔(秒)，避免过快被封
+CONCURRENCY = 8  # 同时进行的详情/图片请求数，替代固定请求间隔来控制对服务器的压力
+# 服务器返回 429/5xx 时按主机退避：优先用 Retry-After，否则指数增长
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE = 0.5  # 秒
+BACKOFF_MAX = 30.0  # 秒
+
+# 卡牌编号: XX00-000, XXXX-000, P-006 等（可带 _01 异画后缀）
+_CARDNO_RE = re.compile(r"([A-Z]{1,5}\d*-\d{2,3}(?:_\d+)?)")
+# 卡包名称中的代码: "补充包 冒险的黎明【OPC-01】" -> "OPC-01"
+_SETCODE_RE = re.compile(r"【([^】]+)】")
 
 HEADERS = {
     "Accept": "application/json, text/plain, */*",
@@ -54,6 +76,98 @@ HEADERS = {
     ),
 }
 
+# ============ 日志 ============
+
+log = logging.getLogger("scraper")
+
+
+def setup_logging() -> QueueListener:
+    """日志经队列交给后台线程写到 stdout，避免在事件循环里逐行 flush"""
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(QueueHandler(log_queue))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
+# ============ HTTP 客户端 ============
+
+
+def create_api_client() -> httpx.AsyncClient:
+    """API 客户端：HTTP/2 多路复用 + 长连接，请求头随客户端统一发送"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(30, connect=10),
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=16),
+        headers=HEADERS,
+    )
+
+
+def create_image_client() -> httpx.AsyncClient:
+    """图片下载客户端（source.windoent.com），单独的连接池，避免大文件下载占满 API 连接"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(30, connect=10),
+        follow_redirects=True,
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        headers=HEADERS,
+    )
+
+
+_backoff_until: Dict[str, float] = {}  # 主机 -> 暂停到的时间点 (time.monotonic)
+
+
+async def _wait_backoff(host: str):
+    """该主机处于退避期时等待，所有并发请求共用同一个暂停时间点"""
+    delay = _backoff_until.get(host, 0.0) - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def _backoff(host: str, resp: httpx.Response, attempt: int):
+    """根据响应记录该主机的退避时间"""
+    retry_after = resp.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        delay = min(float(retry_after), BACKOFF_MAX)
+    else:
+        delay = min(BACKOFF_BASE * 2 ** attempt, BACKOFF_MAX)
+    _backoff_until[host] = max(_backoff_until.get(host, 0.0), time.monotonic() + delay)
+    log.warning(f"  ⏳ {resp.status_code} {resp.url}，{delay:.1f}s 后重试")
+
+
+async def _request(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """GET 请求，遇到 429/5xx 时退避重试；正常情况下不增加任何延迟"""
+    host = httpx.URL(url).host
+    for attempt in range(MAX_RETRIES):
+        await _wait_backoff(host)
+        resp = await client.get(url, **kwargs)
+        if resp.status_code not in RETRY_STATUS:
+            return resp
+        _backoff(host, resp, attempt)
+    # 重试次数用完：最后一次的响应原样返回，由调用方 raise_for_status
+    await _wait_backoff(host)
+    return await client.get(url, **kwargs)
+
+
+@asynccontextmanager
+async def _stream(client: httpx.AsyncClient, url: str):
+    """流式 GET，退避重试规则与 _request 相同"""
+    host = httpx.URL(url).host
+    for attempt in range(MAX_RETRIES + 1):
+        await _wait_backoff(host)
+        async with client.stream("GET", url) as resp:
+            if resp.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+                _backoff(host, resp, attempt)
+                continue
+            yield resp
+            return
+
+
 # ============ API 封装 ============
 
 
@@ -79,20 +193,16 @@ async def fetch_card_list(
         "limit": PAGE_SIZE,
         "page": page,
     }
-    resp = await client.get(
-        f"{BASE_API}/cardList/cardlist/weblist", params=params, headers=HEADERS
-    )
+    resp = await _request(client, f"{BASE_API}/cardList/cardlist/weblist", params=params)
     resp.raise_for_status()
-    return resp.json()
+    return orjson.loads(resp.content)
 
 
 async def fetch_card_detail(client: httpx.AsyncClient, card_id: int) -> Optional[dict]:
     """获取卡牌详情"""
-    resp = await client.get(
-        f"{BASE_API}/cardList/cardlist/webInfo/{card_id}", headers=HEADERS
-    )
+    resp = await _request(client, f"{BASE_API}/cardList/cardlist/webInfo/{card_id}")
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
     if data.get("code") == 0 and data.get("info"):
         return data["info"]
     return None
@@ -100,24 +210,65 @@ async def fetch_card_detail(client: httpx.AsyncClient, card_id: int) -> Optional
 
 async def fetch_sets(client: httpx.AsyncClient) -> List[dict]:
     """获取所有卡包列表"""
-    resp = await client.get(
-        f"{BASE_API}/cardType/cardofferingtype/cachelist", headers=HEADERS
-    )
+    resp = await _request(client, f"{BASE_API}/cardType/cardofferingtype/cachelist")
     resp.raise_for_status()
-    data = resp.json()
+    data = orjson.loads(resp.content)
     return data.get("list", [])
 
 
-async def download_image(client: httpx.AsyncClient, url: str, save_path: Path) -> bool:
-    """下载卡牌图片"""
+def scan_existing_images() -> Set[str]:
+    """一次性列出已下载的图片文件名，之后用集合判断代替逐个 stat"""
+    return {p.name for p in CARDS_DIR.iterdir() if p.is_file()}
+
+
+# 正在进行的下载（目标路径 -> 任务）：同一文件的并发请求共享一次下载
+_downloads: Dict[Path, asyncio.Task[bool]] = {}
+
+
+async def download_image(
+    client: httpx.AsyncClient, url: str, save_path: Path, existing: Optional[Set[str]] = None
+) -> bool:
+    """下载卡牌图片（流式写入磁盘，目录由调用方预先创建）
+
+    existing 为 scan_existing_images() 的结果；未提供时直接检查文件。已存在的图片不再重复下载，
+    同一文件正在下载时等待那次下载的结果。
+    """
+    if existing is not None:
+        if save_path.name in existing:
+            return True
+    elif save_path.exists() and save_path.stat().st_size > 0:
+        return True
+
+    task = _downloads.get(save_path)
+    if task is None:
+        task = asyncio.ensure_future(_download_image(client, url, save_path, existing))
+        _downloads[save_path] = task
+        task.add_done_callback(lambda _: _downloads.pop(save_path, None))
+    return await task
+
+
+async def _download_image(
+    client: httpx.AsyncClient, url: str, save_path: Path, existing: Optional[Set[str]]
+) -> bool:
+    # 先写独立的临时文件，完整下载后再改名，避免中断时留下残缺图片
+    fd, tmp_name = tempfile.mkstemp(dir=save_path.parent, prefix=save_path.name + ".", suffix=".part")
+    os.close(fd)
+    tmp_path = Path(tmp_name)
     try:
-        resp = await client.get(url, follow_redirects=True, timeout=30)
-        resp.raise_for_status()
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-        save_path.write_bytes(resp.content)
+        async with _stream(client, url) as resp:
+            resp.raise_for_status()
+            async with aiofiles.open(tmp_path, "wb") as f:
+                # 不指定 chunk_size：直接写出网络层收到的数据块，省掉重新分块时的一次拷贝
+                async for chunk in resp.aiter_bytes():
+                    await f.write(chunk)
+        os.chmod(tmp_path, 0o644)  # mkstemp 默认 0600，与普通创建的文件保持一致
+        os.replace(tmp_path, save_path)
+        if existing is not None:
+            existing.add(save_path.name)
         return True
     except Exception as e:
-        print(f"  ⚠ 下载图片失败: {url} -> {e}")
+        tmp_path.unlink(missing_ok=True)
+        log.warning(f"  ⚠ 下载图片失败: {url} -> {e}")
         return False
 
 
@@ -131,6 +282,11 @@ def extract_set_code(card_number: str) -> str:
     return card_number
 
 
+def _ext_from_url(url: str) -> str:
+    """从图片 URL 的路径部分取扩展名（忽略查询参数），小写，缺省为 png"""
+    return (os.path.splitext(urlparse(url).path)[1].lstrip(".") or "png").lower()
+
+
 def extract_card_number_from_img(img_url: str) -> Optional[str]:
     """从图片 URL 提取卡牌编号
 
@@ -141,15 +297,28 @@ def extract_card_number_from_img(img_url: str) -> Optional[str]:
     filename = img_url.rsplit("/", 1)[-1] if "/" in img_url else img_url
     filename = unquote(filename)  # 解码 URL 编码
     # 匹配常见格式: XX00-000, XXXX-000, P-006 等
-    match = re.search(r"([A-Z]{1,5}\d*-\d{2,3}(?:_\d+)?)", filename)
+    match = _CARDNO_RE.search(filename)
     if match:
         return match.group(1)
     return None
 
 
-def parse_int_safe(val) -> Optional[int]:
+@lru_cache(maxsize=512)
+def _parse_int_cached(val: str) -> Optional[int]:
+    """费用/力量/反击值的字符串取值有限，解析结果缓存"""
+    if val == "-" or val == "":
+        return None
+    try:
+        return int(val)
+    except ValueError:
+        return None
+
+
+def parse_int_safe(val: Any) -> Optional[int]:
     """安全解析整数，处理 '-' 等非数字值"""
-    if val is None or val == "-" or val == "":
+    if type(val) is str:
+        return _parse_int_cached(val)
+    if val is None:
         return None
     try:
         return int(val)
@@ -157,11 +326,16 @@ def parse_int_safe(val) -> Optional[int]:
         return None
 
 
-def map_card_detail(info: dict) -> dict:
+def map_card_detail(info: Dict[str, Any]) -> Dict[str, Any]:
     """将 API 返回的卡牌信息映射为数据库字段"""
     card_number = info.get("cardNumber", "")
     attribute_list = info.get("cardAttribute", [])
-    attribute = "/".join(attribute_list) if isinstance(attribute_list, list) else str(attribute_list or "")
+    if type(attribute_list) is list:
+        attribute = "/".join(attribute_list)
+    elif isinstance(attribute_list, str):
+        attribute = attribute_list
+    else:
+        attribute = ""
     
     card_type = info.get("cardType", "")
     card_life = parse_int_safe(info.get("cardLife"))
@@ -200,57 +374,96 @@ def map_card_detail(info: dict) -> dict:
 
 
 async def save_card_to_db(card_data: dict, image_local: Optional[str] = None) -> bool:
-    """保存或更新卡牌到数据库"""
+    """保存或更新单张卡牌（与批量写入共用同一条 upsert 语句），返回是否为新增"""
+    row = {**card_data, "image_local": image_local}
+    new_numbers = await flush_cards([row])
+    return row["card_number"] in new_numbers
+
+
+async def bulk_upsert_cards(session, rows: List[dict]) -> Set[str]:
+    """批量插入或更新卡牌（INSERT ... ON CONFLICT DO UPDATE），返回其中新增的卡牌编号
+
+    值为 None 的字段不覆盖已有数据。card_number 会被就地转为大写，与库中存储（UpperString）一致。
+    """
+    if not rows:
+        return set()
+    for r in rows:
+        r["card_number"] = r["card_number"].upper()
+    numbers = [r["card_number"] for r in rows]
+    result = await session.execute(select(Card.card_number).where(Card.card_number.in_(numbers)))
+    existing = set(result.scalars().all())
+
+    table = Card.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.card_number],
+        set_={
+            key: func.coalesce(stmt.excluded[key], table.c[key])
+            for key in rows[0]
+            if key != "card_number"
+        },
+    )
+    await session.execute(stmt, rows)
+    return set(numbers) - existing
+
+
+async def load_stored_card_numbers() -> Set[str]:
+    """一次性读取已入库且已有本地图片的卡牌编号，用于重复运行时跳过详情请求和图片下载"""
     async with async_session() as session:
-        stmt = select(Card).where(Card.card_number == card_data["card_number"])
-        result = await session.execute(stmt)
-        existing = result.scalar_one_or_none()
-
-        if existing:
-            # 更新已有
-            for key, val in card_data.items():
-                if val is not None:
-                    setattr(existing, key, val)
-            if image_local:
-                existing.image_local = image_local
-            await session.commit()
-            return False  # 更新
-        else:
-            # 新增
-            card = Card(**card_data)
-            if image_local:
-                card.image_local = image_local
-            session.add(card)
-            await session.commit()
-            return True  # 新建
+        numbers: ScalarResult[str] = await session.scalars(
+            select(Card.card_number).where(Card.image_local.is_not(None))
+        )
+        return set(numbers)
+
+
+async def flush_cards(rows: List[dict]) -> Set[str]:
+    """在一个事务中写入一批卡牌"""
+    async with async_session() as session:
+        new_numbers = await bulk_upsert_cards(session, rows)
+        await session.commit()
+    return new_numbers
 
 
 # ============ 核心逻辑 ============
 
 
-def find_set_name(sets: List[dict], set_code: str) -> Optional[str]:
-    """通过卡包代码匹配卡包全名
+def _normalize_set_code(code: str) -> str:
+    """处理可能的格式差异: EBC-04 vs EB04, OPC-01 vs OP01"""
+    return code.replace("-", "").replace("C", "")
 
-    例: 'EB04' -> '特别补充包【EBC-04】艾格赫德危机'
-    或  'OPC-01' -> '补充包 冒险的黎明【OPC-01】'
+
+def build_set_index(sets: List[dict]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """把卡包列表按代码建成索引（每次运行建一次），返回 (规范化代码索引, 大写代码索引)
+
+    名称格式举例: "补充包 冒险的黎明【OPC-01】" 或 "基本卡组 草帽一伙【STC-01】"
+    setdefault 保证与逐个扫描时一样先出现者优先
     """
-    code_upper = set_code.upper()
+    by_clean: Dict[str, str] = {}
+    by_upper: Dict[str, str] = {}
     for s in sets:
         name = s.get("name", "")
-        # 检查卡包名称中是否包含匹配的代码
-        # 名称格式举例: "补充包 冒险的黎明【OPC-01】" 或 "基本卡组 草帽一伙【STC-01】"
-        match = re.search(r"【([^】]+)】", name)
+        match = _SETCODE_RE.search(name)
         if match:
             inner_code = match.group(1)
-            # 处理可能的格式差异: EBC-04 vs EB04, OPC-01 vs OP01
-            inner_clean = inner_code.replace("-", "").replace("C", "")
-            code_clean = code_upper.replace("-", "").replace("C", "")
-            if inner_clean == code_clean or inner_code.upper() == code_upper:
-                return name
-            # 也试试去掉中间的 C: OPC-01 对应 OP01
-            if inner_code.replace("C", "").replace("-", "") == code_upper.replace("-", ""):
-                return name
-    return None
+            by_clean.setdefault(_normalize_set_code(inner_code), name)
+            by_upper.setdefault(inner_code.upper(), name)
+    return by_clean, by_upper
+
+
+def find_set_name(set_index: Tuple[Dict[str, str], Dict[str, str]], set_code: str) -> Optional[str]:
+    """通过卡包代码匹配卡包全名，set_index 为 build_set_index() 的结果
+
+    例: 'EB04' -> '特别补充包【EBC-04】艾格赫德危机'
+    或  'OPC-01' -> '补充包 冒险的黎明【OPC-01】'
+    """
+    by_clean, by_upper = set_index
+    code_upper = set_code.upper()
+    return (
+        by_clean.get(_normalize_set_code(code_upper))
+        or by_upper.get(code_upper)
+        # 也试试去掉中间的 C: OPC-01 对应 OP01
+        or by_clean.get(code_upper.replace("-", ""))
+    )
 
 
 async def scrape_by_card_numbers(card_numbers: List[str]):
@@ -258,18 +471,18 @@ async def scrape_by_card_numbers(card_numbers: List[str]):
     await init_db()
     CARDS_DIR.mkdir(parents=True, exist_ok=True)
 
-    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+    async with create_api_client() as client, create_image_client() as img_client:
         found_count = 0
         total = len(card_numbers)
         not_found = []
 
-        print(f"\n{'='*60}")
-        print(f"开始搜索 {total} 张卡牌")
-        print(f"{'='*60}")
+        log.info(f"\n{'='*60}")
+        log.info(f"开始搜索 {total} 张卡牌")
+        log.info(f"{'='*60}")
 
         for card_no in card_numbers:
             card_no = card_no.upper().strip()
-            print(f"\n🔍 搜索: {card_no}")
+            log.info(f"\n🔍 搜索: {card_no}")
             
             # 直接用 cardName 参数搜索卡号
             data = await fetch_card_list(client, page=1, card_name=card_no)
@@ -277,7 +490,7 @@ async def scrape_by_card_numbers(card_numbers: List[str]):
             card_list = page_data.get("list", [])
             
             if not card_list:
-                print(f"  ⚠ 未找到")
+                log.warning("  ⚠ 未找到")
                 not_found.append(card_no)
                 continue
             
@@ -291,196 +504,246 @@ async def scrape_by_card_numbers(card_numbers: List[str]):
                 
                 if base_number and base_number == card_no:
                     found = True
-                    await asyncio.sleep(REQUEST_DELAY)
                     
                     detail = await fetch_card_detail(client, card_id)
                     if detail:
                         card_data = map_card_detail(detail)
                         # 下载图片
-                        ext = img_url.rsplit(".", 1)[-1] if "." in img_url else "png"
+                        ext = _ext_from_url(img_url)
                         img_filename = f"{card_data['card_number']}.{ext}"
                         img_path = CARDS_DIR / img_filename
-                        downloaded = await download_image(client, img_url, img_path)
+                        downloaded = await download_image(img_client, img_url, img_path)
                         image_local = f"cards/{img_filename}" if downloaded else None
 
                         is_new = await save_card_to_db(card_data, image_local)
                         status = "✅ 新增" if is_new else "🔄 更新"
-                        print(f"  {status} {card_data['card_number']} - {card_data['name_cn']}")
-                        print(f"     类型: {card_data['card_type']} | 颜色: {card_data['color']} | 稀有度: {card_data['rarity']}")
+                        log.info(f"  {status} {card_data['card_number']} - {card_data['name_cn']}")
+                        log.info(f"     类型: {card_data['card_type']} | 颜色: {card_data['color']} | 稀有度: {card_data['rarity']}")
                         if card_data['power']:
-                            print(f"     力量: {card_data['power']}")
+                            log.info(f"     力量: {card_data['power']}")
                         found_count += 1
                     else:
-                        print(f"  ⚠ 获取详情失败: id={card_id}")
+                        log.warning(f"  ⚠ 获取详情失败: id={card_id}")
                     break
             
             if not found:
-                print(f"  ⚠ 搜索结果中无精确匹配")
+                log.warning("  ⚠ 搜索结果中无精确匹配")
                 not_found.append(card_no)
-            
-            await asyncio.sleep(REQUEST_DELAY)
 
-        print(f"\n{'='*60}")
-        print(f"完成！共找到 {found_count}/{total} 张卡牌")
+        log.info(f"\n{'='*60}")
+        log.info(f"完成！共找到 {found_count}/{total} 张卡牌")
         if not_found:
-            print(f"未找到: {', '.join(not_found)}")
-        print(f"图片保存在: {CARDS_DIR}")
-        print(f"{'='*60}")
+            log.info(f"未找到: {', '.join(not_found)}")
+        log.info(f"图片保存在: {CARDS_DIR}")
+        log.info(f"{'='*60}")
 
 
-async def scrape_by_set(set_code: str):
+async def process_card(
+    client: httpx.AsyncClient,
+    img_client: httpx.AsyncClient,
+    item: dict,
+    sem: asyncio.Semaphore,
+    existing_images: Set[str],
+) -> Optional[dict]:
+    """获取单张卡牌详情并下载图片，返回待写入数据库的卡牌数据"""
+    async with sem:
+        img_url = item.get("cardImg", "")
+
+        # 单张卡失败只记录并跳过，不影响同页其余卡牌写库
+        card_id = item["id"]
+        try:
+            detail = await fetch_card_detail(client, card_id)
+        except Exception as e:
+            log.warning(f"  ⚠ 获取详情失败: id={card_id} -> {e}")
+            return None
+        if not detail:
+            return None
+
+        card_data = map_card_detail(detail)
+
+        ext = _ext_from_url(img_url)
+
+        # 异画版（如 _01）用不同文件名，避免覆盖普通版图片
+        img_number = extract_card_number_from_img(img_url)
+        if img_number and "_" in img_number:
+            img_filename = f"{img_number}.{ext}"
+        else:
+            img_filename = f"{card_data['card_number']}.{ext}"
+
+        img_path = CARDS_DIR / img_filename
+        downloaded = await download_image(img_client, img_url, img_path, existing_images)
+        card_data["image_local"] = f"cards/{img_filename}" if downloaded else None
+        return card_data
+
+
+def is_card_stored(item: dict, stored_numbers: Set[str], existing_images: Set[str]) -> bool:
+    """根据列表项的图片 URL 判断卡牌是否已入库且图片已下载（异画版按基础编号查库）"""
+    img_url = item.get("cardImg", "")
+    img_number = extract_card_number_from_img(img_url)
+    if not img_number or img_number.split("_", 1)[0] not in stored_numbers:
+        return False
+    ext = _ext_from_url(img_url)
+    return f"{img_number}.{ext}" in existing_images
+
+
+async def process_page(
+    client: httpx.AsyncClient,
+    img_client: httpx.AsyncClient,
+    card_list: List[dict],
+    seen_ids: Set[int],
+    sem: asyncio.Semaphore,
+    existing_images: Set[str],
+    stored_numbers: Optional[Set[str]] = None,
+) -> List[dict]:
+    """并发处理一页卡牌（并发度由 sem 限制），按原顺序返回成功的结果
+
+    stored_numbers 为 load_stored_card_numbers() 的结果；卡牌已入库且图片文件已存在时直接跳过。
+    """
+    items = []
+    skipped = 0
+    for item in card_list:
+        card_id = item["id"]
+        if card_id in seen_ids:
+            continue
+        seen_ids.add(card_id)
+        if stored_numbers is not None and is_card_stored(item, stored_numbers, existing_images):
+            skipped += 1
+            continue
+        items.append(item)
+    if skipped:
+        log.info(f"  ⏭ 跳过 {skipped} 张已入库卡牌")
+
+    results = await asyncio.gather(*(process_card(client, img_client, item, sem, existing_images) for item in items))
+    return [r for r in results if r]
+
+
+async def fetch_all_pages(client: httpx.AsyncClient, sem: asyncio.Semaphore, **filters) -> List[dict]:
+    """获取第 1 页得到总页数后，其余页并发请求（并发度由 sem 限制），按页码顺序返回各页 page 数据"""
+    first = await fetch_card_list(client, page=1, **filters)
+    total_pages = first.get("page", {}).get("totalPage", 0)
+
+    async def fetch(page: int) -> Dict:
+        async with sem:
+            return await fetch_card_list(client, page=page, **filters)
+
+    rest = await asyncio.gather(*(fetch(page) for page in range(2, total_pages + 1)))
+    return [data.get("page", {}) for data in (first, *rest)]
+
+
+async def scrape_by_set(set_code: str, force: bool = False):
     """爬取整个卡包的所有卡牌"""
     await init_db()
     CARDS_DIR.mkdir(parents=True, exist_ok=True)
 
-    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
+    async with create_api_client() as client, create_image_client() as img_client:
         sets = await fetch_sets(client)
-        set_name = find_set_name(sets, set_code)
+        set_name = find_set_name(build_set_index(sets), set_code)
 
         if not set_name:
-            print(f"❌ 未找到卡包代码 '{set_code}' 对应的卡包")
-            print("可用卡包：")
+            log.error(f"❌ 未找到卡包代码 '{set_code}' 对应的卡包")
+            log.info("可用卡包：")
             for s in sets:
-                match = re.search(r"【([^】]+)】", s["name"])
+                match = _SETCODE_RE.search(s["name"])
                 if match:
-                    print(f"  {match.group(1):>8}  {s['name']}")
+                    log.info(f"  {match.group(1):>8}  {s['name']}")
             return
 
-        print(f"\n{'='*60}")
-        print(f"爬取卡包: {set_name}")
-        print(f"{'='*60}")
+        log.info(f"\n{'='*60}")
+        log.info(f"爬取卡包: {set_name}")
+        log.info(f"{'='*60}")
 
-        page = 1
         count = 0
-        seen_ids = set()
+        seen_ids: Set[int] = set()
+        sem = asyncio.Semaphore(CONCURRENCY)
+        # --force 时视为磁盘上没有图片，全部重新下载（本次运行内仍去重）
+        existing_images = set() if force else scan_existing_images()
+        stored_numbers = None if force else await load_stored_card_numbers()
 
-        while True:
-            data = await fetch_card_list(client, page=page, card_offer_type=set_name)
-            page_data = data.get("page", {})
-            card_list = page_data.get("list", [])
-            total_pages = page_data.get("totalPage", 0)
-            total_count = page_data.get("totalCount", 0)
+        pages = await fetch_all_pages(client, sem, card_offer_type=set_name)
+        total_pages = pages[0].get("totalPage", 0)
+        total_count = pages[0].get("totalCount", 0)
 
+        for page, page_data in enumerate(pages, 1):
+            card_list = page_data.get("list", [])
             if not card_list:
                 break
 
-            print(f"\n--- 第 {page}/{total_pages} 页 (共 {total_count} 张) ---")
-
-            for item in card_list:
-                card_id = item.get("id")
-                if card_id in seen_ids:
-                    continue
-                seen_ids.add(card_id)
-
-                img_url = item.get("cardImg", "")
-                await asyncio.sleep(REQUEST_DELAY)
-
-                detail = await fetch_card_detail(client, card_id)
-                if detail:
-                    card_data = map_card_detail(detail)
-                    ext = img_url.rsplit(".", 1)[-1] if "." in img_url else "png"
-                    img_filename = f"{card_data['card_number']}.{ext}"
-                    img_path = CARDS_DIR / img_filename
-
-                    # 跳过已有的变体图（如 _01 异画版）
-                    img_number = extract_card_number_from_img(img_url)
-                    if img_number and "_" in img_number:
-                        # 异画版，用不同文件名
-                        img_filename = f"{img_number}.{ext}"
-                        img_path = CARDS_DIR / img_filename
-
-                    downloaded = await download_image(client, img_url, img_path)
-                    image_local = f"cards/{img_filename}" if downloaded else None
+            log.info(f"\n--- 第 {page}/{total_pages} 页 (共 {total_count} 张) ---")
 
-                    is_new = await save_card_to_db(card_data, image_local)
-                    status = "✅" if is_new else "🔄"
-                    print(f"  {status} {card_data['card_number']:>10} {card_data['name_cn']:<12} "
-                          f"{card_data['card_type']:<4} {card_data['color']:<6} {card_data['rarity']}")
-                    count += 1
+            batch = await process_page(
+                client, img_client, card_list, seen_ids, sem, existing_images, stored_numbers
+            )
 
-            if page >= total_pages:
-                break
-            page += 1
+            # 每页一次批量写入
+            new_numbers = await flush_cards(batch)
+            lines = []
+            for card_data in batch:
+                status = "✅" if card_data["card_number"] in new_numbers else "🔄"
+                lines.append(f"  {status} {card_data['card_number']:>10} {card_data['name_cn']:<12} "
+                             f"{card_data['card_type']:<4} {card_data['color']:<6} {card_data['rarity']}")
+            if lines:
+                log.info("\n".join(lines))  # 每页输出一次
+            count += len(batch)
 
-        print(f"\n{'='*60}")
-        print(f"完成！共处理 {count} 张卡牌")
-        print(f"图片保存在: {CARDS_DIR}")
-        print(f"{'='*60}")
+        log.info(f"\n{'='*60}")
+        log.info(f"完成！共处理 {count} 张卡牌")
+        log.info(f"图片保存在: {CARDS_DIR}")
+        log.info(f"{'='*60}")
 
 
-async def scrape_all():
+async def scrape_all(force: bool = False):
     """爬取所有卡牌"""
     await init_db()
     CARDS_DIR.mkdir(parents=True, exist_ok=True)
 
-    async with httpx.AsyncClient(timeout=30, follow_redirects=True) as client:
-        page = 1
+    async with create_api_client() as client, create_image_client() as img_client:
         count = 0
-        seen_ids = set()
-
-        # 先获取总数
-        data = await fetch_card_list(client, page=1)
-        total_count = data.get("page", {}).get("totalCount", 0)
-        total_pages = data.get("page", {}).get("totalPage", 0)
-        print(f"\n共 {total_count} 张卡牌，{total_pages} 页")
-        print(f"预计需要 {total_count * REQUEST_DELAY / 60:.1f} 分钟\n")
-
-        while True:
-            data = await fetch_card_list(client, page=page)
-            page_data = data.get("page", {})
+        seen_ids: Set[int] = set()
+        sem = asyncio.Semaphore(CONCURRENCY)
+        # --force 时视为磁盘上没有图片，全部重新下载（本次运行内仍去重）
+        existing_images = set() if force else scan_existing_images()
+        stored_numbers = None if force else await load_stored_card_numbers()
+
+        # 第 1 页给出总数，其余页并发获取
+        pages = await fetch_all_pages(client, sem)
+        total_count = pages[0].get("totalCount", 0)
+        total_pages = pages[0].get("totalPage", 0)
+        log.info(f"\n共 {total_count} 张卡牌，{total_pages} 页\n")
+
+        for page, page_data in enumerate(pages, 1):
             card_list = page_data.get("list", [])
-
             if not card_list:
                 break
 
-            print(f"--- 第 {page}/{total_pages} 页 ---")
-
-            for item in card_list:
-                card_id = item.get("id")
-                if card_id in seen_ids:
-                    continue
-                seen_ids.add(card_id)
-
-                img_url = item.get("cardImg", "")
-                await asyncio.sleep(REQUEST_DELAY)
-
-                detail = await fetch_card_detail(client, card_id)
-                if detail:
-                    card_data = map_card_detail(detail)
-                    ext = img_url.rsplit(".", 1)[-1] if "." in img_url else "png"
+            log.info(f"--- 第 {page}/{total_pages} 页 ---")
 
-                    img_number = extract_card_number_from_img(img_url)
-                    if img_number and "_" in img_number:
-                        img_filename = f"{img_number}.{ext}"
-                    else:
-                        img_filename = f"{card_data['card_number']}.{ext}"
+            batch = await process_page(
+                client, img_client, card_list, seen_ids, sem, existing_images, stored_numbers
+            )
 
-                    img_path = CARDS_DIR / img_filename
-                    downloaded = await download_image(client, img_url, img_path)
-                    image_local = f"cards/{img_filename}" if downloaded else None
+            # 每页一次批量写入
+            new_numbers = await flush_cards(batch)
+            lines = []
+            for card_data in batch:
+                status = "✅" if card_data["card_number"] in new_numbers else "🔄"
+                lines.append(f"  {status} {card_data['card_number']:>10} {card_data['name_cn']}")
+            if lines:
+                log.info("\n".join(lines))  # 每页输出一次
+            count += len(batch)
 
-                    is_new = await save_card_to_db(card_data, image_local)
-                    status = "✅" if is_new else "🔄"
-                    print(f"  {status} {card_data['card_number']:>10} {card_data['name_cn']}")
-                    count += 1
-
-            if page >= total_pages:
-                break
-            page += 1
-
-        print(f"\n完成！共处理 {count} 张卡牌")
+        log.info(f"\n完成！共处理 {count} 张卡牌")
 
 
 async def list_sets():
     """列出所有可用卡包"""
-    async with httpx.AsyncClient(timeout=30) as client:
+    async with create_api_client() as client:
         sets = await fetch_sets(client)
         print(f"\n{'='*60}")
         print(f"{'卡包代码':>12}  {'卡包名称'}")
         print(f"{'='*60}")
         for s in sets:
             name = s.get("name", "")
-            match = re.search(r"【([^】]+)】", name)
+            match = _SETCODE_RE.search(name)
             code = match.group(1) if match else "---"
             print(f"  {code:>12}  {name}")
         print(f"{'='*60}")
@@ -499,6 +762,7 @@ def main():
   python scraper.py --set EB04            爬取整个卡包
   python scraper.py --set OPC-01          爬取补充包 OPC-01
   python scraper.py --all                 爬取所有卡牌
+  python scraper.py --all --force         重新爬取所有卡牌详情并重新下载图片
   python scraper.py --list-sets           列出所有卡包
         """,
     )
@@ -506,17 +770,25 @@ def main():
     parser.add_argument("--set", dest="set_code", help="按卡包代码爬取整个卡包")
     parser.add_argument("--all", action="store_true", help="爬取所有卡牌")
     parser.add_argument("--list-sets", action="store_true", help="列出所有可用卡包")
+    parser.add_argument("--force", action="store_true", help="重新获取所有卡牌详情并重新下载图片")
 
     args = parser.parse_args()
+    listener = setup_logging()
+    try:
+        run(parser, args)
+    finally:
+        listener.stop()
+
 
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace):
     if args.list_sets:
         asyncio.run(list_sets())
     elif args.all:
         confirm = input("确认爬取所有卡牌？这可能需要较长时间 (y/N): ")
         if confirm.lower() == "y":
-            asyncio.run(scrape_all())
+            asyncio.run(scrape_all(args.force))
     elif args.set_code:
-        asyncio.run(scrape_by_set(args.set_code))
+        asyncio.run(scrape_by_set(args.set_code, args.force))
     elif args.card_numbers:
         asyncio.run(scrape_by_card_numbers(args.card_numbers))
     else:
@@ -1,13 +1,12 @@
 #!/usr/bin/env python3
 """写入预设卡组到数据库"""
 import sqlite3
-import json
+import orjson
 import uuid
 
 conn = sqlite3.connect('card_game.db')
-
-# 清空现有卡组
-conn.execute("DELETE FROM decks WHERE user_id = 'system'")
+conn.execute("PRAGMA journal_mode=WAL")
+conn.execute("PRAGMA synchronous=NORMAL")
 
 # 白胡子卡组 (Edward.Newgate) - Limitless TCG Jimmy Hu
 whitebeard_cards = [
@@ -52,20 +51,22 @@ decks = [
     ("红索隆 (Roronoa Zoro)", "OP01-001", zoro_cards),
 ]
 
-for name, leader, cards in decks:
-    conn.execute(
+rows = [(str(uuid.uuid4()), "system", name, leader, orjson.dumps(cards).decode()) for name, leader, cards in decks]
+
+# 清空现有卡组并批量写入，同一事务内完成
+with conn:
+    conn.execute("DELETE FROM decks WHERE user_id = 'system'")
+    conn.executemany(
         "INSERT INTO decks (id, user_id, name, leader_card_number, cards) VALUES (?, ?, ?, ?, ?)",
-        (str(uuid.uuid4()), "system", name, leader, json.dumps(cards))
+        rows,
     )
-
-conn.commit()
 print("卡组已写入数据库!")
 print()
 
 # 验证
 cursor = conn.execute("SELECT name, leader_card_number, cards FROM decks")
 for name, leader, cards in cursor.fetchall():
-    card_list = json.loads(cards)
+    card_list = orjson.loads(cards)
     total = sum(c["count"] for c in card_list)
     print(f"{name}")
     print(f"  领袖: {leader}")
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+import pytest
+
+# 必须在导入 app 之前设置：settings 在导入时读取 DATABASE_URL
+DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """临时 SQLite 库上的测试客户端（lifespan 会建表并写入 mock 卡牌）"""
+    with TestClient(app) as c:
+        yield c
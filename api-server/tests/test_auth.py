@@ -0,0 +1,28 @@
+def test_register_and_login(client):
+    r = client.post("/api/auth/register", json={"username": "alice", "password": "secret"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["token"]
+    assert body["user"]["username"] == "alice"
+
+    r = client.post("/api/auth/login", json={"username": "alice", "password": "secret"})
+    assert r.status_code == 200
+    assert r.json()["user"]["id"] == body["user"]["id"]
+
+
+def test_register_duplicate_username(client):
+    assert client.post("/api/auth/register", json={"username": "bob", "password": "p1"}).status_code == 200
+    r = client.post("/api/auth/register", json={"username": "bob", "password": "p2"})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "用户名已存在"
+
+
+def test_login_wrong_password(client):
+    client.post("/api/auth/register", json={"username": "carol", "password": "right"})
+    r = client.post("/api/auth/login", json={"username": "carol", "password": "wrong"})
+    assert r.status_code == 401
+
+
+def test_login_unknown_user(client):
+    r = client.post("/api/auth/login", json={"username": "nobody", "password": "x"})
+    assert r.status_code == 401
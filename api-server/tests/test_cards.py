@@ -0,0 +1,58 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from conftest import DB_PATH
+
+# 名称命中一张、效果文本中间命中一张：unicode61 分词下后者会漏掉
+EXTRA_CARDS = [
+    ("ZZ01-002", "路飞船长", "登场时：抽1张卡"),
+    ("ZZ01-001", "测试角色", "登场时：从手牌中将路飞船长登场"),
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def extra_cards(client):
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.executemany(
+            "INSERT INTO cards (id, card_number, name, name_cn, card_type, color, effect) "
+            "VALUES (?, ?, ?, ?, 'CHARACTER', 'RED', ?)",
+            [(str(uuid.uuid4()), num, name, name, effect) for num, name, effect in EXTRA_CARDS],
+        )
+    conn.close()
+
+
+def _search(client, q):
+    r = client.get("/api/cards/search", params={"q": q})
+    assert r.status_code == 200
+    return [c["cardNumber"] for c in r.json()["cards"]]
+
+
+def test_search_chinese_substring_in_effect(client):
+    # 走 trigram 索引：名称和效果文本中间的子串都要命中
+    assert _search(client, "路飞船长") == ["ZZ01-001", "ZZ01-002"]
+
+
+def test_search_short_query_uses_like(client):
+    # 少于 3 个字符走 LIKE，同样做子串匹配
+    result = _search(client, "路飞")
+    assert "ZZ01-001" in result and "ZZ01-002" in result
+
+
+def test_search_mid_word_substring(client):
+    assert "ST01-001" in _search(client, "uff")
+    assert "ST01-001" in _search(client, "LUFFY")
+
+
+def test_search_results_ordered_by_card_number(client):
+    for q in ("登场", "登场时"):
+        result = _search(client, q)
+        assert result == sorted(result)
+
+
+def test_search_fts_syntax_is_escaped(client):
+    # 含 FTS 语法字符的输入按普通文本处理，不会因语法错误返回 500
+    assert _search(client, 'AND "(*') == []
+    assert isinstance(_search(client, "NEAR("), list)
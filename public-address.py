@@ -1,7 +1,23 @@
 import sys
-from qrcode import make
+from qrcode import QRCode
 
-# 如果提供了命令行参数，使用它；否则使用默认 URL
-url = sys.argv[1] if len(sys.argv) > 1 else "https://example.com"
-make(url).save("url.png")
-print(f"二维码已生成: {url}")
+# 复用同一个 QRCode 对象，批量生成时不必每次重新创建
+_qr = QRCode()
+
+
+def make_qr(url, qr=_qr):
+    """生成单个 URL 的二维码图片"""
+    qr.clear()
+    qr.version = None  # clear() 不重置版本，否则 fit 会从上一个 URL 的版本开始
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.make_image()
+
+
+# 如果提供了命令行参数，使用它们（可传多个 URL）；否则使用默认 URL
+urls = sys.argv[1:] or ["https://example.com"]
+for i, url in enumerate(urls, 1):
+    # 单个 URL 时仍写到 url.png，多个时按顺序编号
+    filename = "url.png" if len(urls) == 1 else f"url-{i}.png"
+    make_qr(url).save(filename)
+    print(f"二维码已生成: {url} -> {filename}")